@@ -4,15 +4,79 @@ charts.py - Generación de gráficos de evolución de precios con matplotlib
 
 import io
 import os
-from datetime import datetime
+import threading
 from typing import Optional
 
 import matplotlib
 matplotlib.use("Agg")  # Backend sin GUI
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from matplotlib.ticker import FuncFormatter
+import numpy as np
 import pandas as pd
+from PIL import Image
+
+# Formato de salida: "png" (default) o "webp" (más chico y rápido de
+# codificar; Telegram lo acepta pero lo re-comprime como foto)
+CHART_FORMAT = os.getenv("CHART_FORMAT", "png").lower()
+
+# Los gráficos se mandan una vez por Telegram y se descartan:
+# zlib al mínimo ahorra mucho CPU a cambio de unos KB más.
+PNG_PIL_KWARGS = {"compress_level": 1}
+WEBP_SAVE_KWARGS = {"quality": 80, "method": 0}
+
+# Estilo oscuro tipo "trading": se aplica una sola vez al importar en vez
+# de re-aplicar la hoja de estilo en cada gráfico
+_DARK_STYLE = dict(matplotlib.style.library["dark_background"])
+matplotlib.rcParams.update(_DARK_STYLE)
+
+# Figura y buffer reutilizables, uno por thread (crear una Figure por
+# gráfico es caro: canvas, renderer, fuentes...).
+_tls = threading.local()
+
+
+def _get_figure(figsize: tuple) -> Figure:
+    """Retorna la figura del thread actual, limpia y con el tamaño pedido."""
+    fig = getattr(_tls, "fig", None)
+    if fig is None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        _tls.fig = fig
+    fig.clear()
+    fig.set_size_inches(figsize)
+    return fig
+
+
+def _export_image(fig: Figure, dpi: int, facecolor=None) -> bytes:
+    """Renderiza la figura a CHART_FORMAT usando el buffer del thread actual."""
+    buf = getattr(_tls, "buf", None)
+    if buf is None:
+        buf = _tls.buf = io.BytesIO()
+    buf.seek(0)
+    buf.truncate()
+
+    if CHART_FORMAT == "webp":
+        # Render directo del canvas Agg y encode WebP con Pillow
+        if facecolor is not None:
+            fig.patch.set_facecolor(facecolor)
+        fig.set_dpi(dpi)
+        fig.canvas.draw()
+        width, height = fig.canvas.get_width_height()
+        image = Image.frombuffer("RGBA", (width, height), fig.canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+        image.save(buf, "WEBP", **WEBP_SAVE_KWARGS)
+    else:
+        kwargs = {"facecolor": facecolor} if facecolor is not None else {}
+        fig.savefig(buf, format="png", dpi=dpi, pil_kwargs=PNG_PIL_KWARGS, **kwargs)
+    return buf.getvalue()
+
+
+# Cache de gráficos ya renderizados: (product_id, registros, último
+# checked_at, precio actual, moneda) → bytes de la imagen. FIFO acotado.
+_CHART_CACHE: dict = {}
+_CHART_CACHE_LOCK = threading.Lock()
+_CHART_CACHE_MAX = 128
 
 
 def format_price_axis(currency: str = "ARS"):
@@ -31,33 +95,73 @@ def generate_price_chart(
     store: str,
     history: list,
     current_price: Optional[float] = None,
-    currency: str = "ARS"
+    currency: str = "ARS",
+    product_id: Optional[int] = None
 ) -> bytes:
     """
     Genera un gráfico de evolución de precios.
-    Retorna los bytes del PNG.
+    Retorna los bytes de la imagen (ver CHART_FORMAT).
+    Si se pasa product_id, reutiliza el último render mientras el
+    historial no haya cambiado.
     """
+    key = chart_cache_key(product_id, history, current_price, currency)
+    if key is None:
+        return _render_price_chart(product_name, store, history, current_price, currency)
+
+    cached = get_cached_chart(key)
+    if cached is not None:
+        return cached
+
+    image_bytes = _render_price_chart(product_name, store, history, current_price, currency)
+    cache_chart(key, image_bytes)
+    return image_bytes
+
+
+def chart_cache_key(
+    product_id: Optional[int],
+    history: list,
+    current_price: Optional[float],
+    currency: str
+) -> Optional[tuple]:
+    """Clave de _CHART_CACHE para un gráfico, o None si no se puede cachear."""
+    if product_id is None or not history:
+        return None
+    return (product_id, len(history), history[-1]["checked_at"], current_price, currency)
+
+
+def get_cached_chart(key: tuple) -> Optional[bytes]:
+    with _CHART_CACHE_LOCK:
+        return _CHART_CACHE.get(key)
+
+
+def cache_chart(key: tuple, image_bytes: bytes):
+    with _CHART_CACHE_LOCK:
+        if len(_CHART_CACHE) >= _CHART_CACHE_MAX:
+            del _CHART_CACHE[next(iter(_CHART_CACHE))]
+        _CHART_CACHE[key] = image_bytes
+
+
+def _render_price_chart(
+    product_name: str,
+    store: str,
+    history: list,
+    current_price: Optional[float],
+    currency: str
+) -> bytes:
     if not history:
         return _generate_no_data_chart(product_name)
 
-    # Preparar datos
-    dates = []
-    prices = []
-    for entry in history:
-        if entry["price"] is not None:
-            try:
-                dt = datetime.fromisoformat(entry["checked_at"])
-            except Exception:
-                dt = datetime.now()
-            dates.append(dt)
-            prices.append(entry["price"])
-
-    if not prices:
+    # Preparar datos (fechas inválidas → ahora)
+    df = pd.DataFrame(history, columns=list(history[0].keys()))
+    df = df[df["price"].notna()]
+    if df.empty:
         return _generate_no_data_chart(product_name)
 
-    # ── Estilo oscuro tipo "trading" ──
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(10, 5))
+    dates = pd.to_datetime(df["checked_at"], errors="coerce").fillna(pd.Timestamp.now()).tolist()
+    prices = df["price"].to_numpy(dtype=np.float64)
+
+    fig = _get_figure((10, 5))
+    ax = fig.add_subplot()
     fig.patch.set_facecolor("#0d1117")
     ax.set_facecolor("#161b22")
 
@@ -68,10 +172,10 @@ def generate_price_chart(
     ax.plot(dates, prices, color="#58a6ff", linewidth=2.5, zorder=3)
 
     # ── Marcar el mínimo y máximo ──
-    min_price = min(prices)
-    max_price = max(prices)
-    min_idx = prices.index(min_price)
-    max_idx = prices.index(max_price)
+    min_idx = int(prices.argmin())
+    max_idx = int(prices.argmax())
+    min_price = prices[min_idx]
+    max_price = prices[max_idx]
 
     ax.scatter([dates[min_idx]], [min_price], color="#3fb950", s=100, zorder=5, label=f"Mínimo")
     ax.annotate(
@@ -97,7 +201,7 @@ def generate_price_chart(
         )
 
     # ── Línea de precio promedio ──
-    avg_price = sum(prices) / len(prices)
+    avg_price = prices.mean()
     ax.axhline(y=avg_price, color="#8b949e", linewidth=1, linestyle="--", alpha=0.6)
     ax.text(
         dates[0], avg_price * 1.01,
@@ -108,8 +212,8 @@ def generate_price_chart(
     # ── Formateo de ejes ──
     ax.yaxis.set_major_formatter(format_price_axis(currency))
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m %H:%M"))
-    plt.xticks(rotation=30, ha="right", fontsize=8, color="#8b949e")
-    plt.yticks(fontsize=9, color="#8b949e")
+    plt.setp(ax.get_xticklabels(), rotation=30, ha="right", fontsize=8, color="#8b949e")
+    plt.setp(ax.get_yticklabels(), fontsize=9, color="#8b949e")
 
     # ── Grid sutil ──
     ax.grid(True, color="#21262d", linestyle="-", linewidth=0.8, alpha=0.8)
@@ -119,7 +223,7 @@ def generate_price_chart(
 
     # ── Variación porcentual ──
     if len(prices) >= 2:
-        pct_change = ((prices[-1] - prices[0]) / prices[0]) * 100
+        pct_change = (prices[-1] / prices[0] - 1) * 100
         change_color = "#3fb950" if pct_change <= 0 else "#f85149"
         change_arrow = "▼" if pct_change <= 0 else "▲"
         change_text = f"{change_arrow} {abs(pct_change):.1f}% vs inicio"
@@ -138,21 +242,16 @@ def generate_price_chart(
     fig.text(0.5, 0.01, f"Fuente: {store_display} · {len(prices)} registros",
              ha="center", color="#8b949e", fontsize=8, transform=fig.transFigure)
 
-    plt.tight_layout(rect=[0, 0.04, 1, 1])
+    fig.tight_layout(rect=[0, 0.04, 1, 1])
 
     # ── Exportar a bytes ──
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=130, bbox_inches="tight",
-                facecolor=fig.get_facecolor())
-    buf.seek(0)
-    plt.close(fig)
-    return buf.read()
+    return _export_image(fig, dpi=130, facecolor=fig.get_facecolor())
 
 
 def _generate_no_data_chart(product_name: str) -> bytes:
     """Genera una imagen de placeholder cuando no hay datos."""
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(8, 4))
+    fig = _get_figure((8, 4))
+    ax = fig.add_subplot()
     fig.patch.set_facecolor("#0d1117")
     ax.set_facecolor("#161b22")
     ax.text(0.5, 0.5, "📊 Sin datos suficientes aún\nVolvé más tarde",
@@ -160,11 +259,7 @@ def _generate_no_data_chart(product_name: str) -> bytes:
             fontsize=14, transform=ax.transAxes)
     ax.set_title(product_name[:60], color="#e6edf3", fontsize=11)
     ax.axis("off")
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=100, bbox_inches="tight")
-    buf.seek(0)
-    plt.close(fig)
-    return buf.read()
+    return _export_image(fig, dpi=100)
 
 
 def generate_summary_chart(products_data: list) -> bytes:
@@ -175,8 +270,8 @@ def generate_summary_chart(products_data: list) -> bytes:
     if not products_data:
         return _generate_no_data_chart("Resumen de productos")
 
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(10, max(4, len(products_data) * 0.8)))
+    fig = _get_figure((10, max(4, len(products_data) * 0.8)))
+    ax = fig.add_subplot()
     fig.patch.set_facecolor("#0d1117")
     ax.set_facecolor("#161b22")
 
@@ -203,10 +298,5 @@ def generate_summary_chart(products_data: list) -> bytes:
     for spine in ax.spines.values():
         spine.set_edgecolor("#30363d")
 
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=120, bbox_inches="tight",
-                facecolor=fig.get_facecolor())
-    buf.seek(0)
-    plt.close(fig)
-    return buf.read()
+    fig.tight_layout()
+    return _export_image(fig, dpi=120, facecolor=fig.get_facecolor())
@@ -4,6 +4,7 @@ database.py - Manejo de SQLite para persistencia de precios
 
 import sqlite3
 import os
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -11,10 +12,23 @@ load_dotenv()
 
 DB_FILE = os.getenv("DB_FILE", "prices.db")
 
+# Una conexión por thread, abierta una sola vez y reutilizada
+_local = threading.local()
+
 
 def get_connection():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        # WAL: los INSERT de save_price no bloquean a los lectores
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # ~20 MB de cache de páginas, lecturas por mmap y temporales en memoria
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _local.conn = conn
     return conn
 
 
@@ -48,8 +62,17 @@ def init_db():
         )
     """)
 
+    # Índices para las consultas por producto ordenadas por fecha
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_price_history_product_time
+        ON price_history(product_id, checked_at DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_products_active
+        ON products(active) WHERE active = 1
+    """)
+
     conn.commit()
-    conn.close()
     print("✅ Base de datos inicializada.")
 
 
@@ -68,12 +91,11 @@ def add_product(name: str, url: str, store: str) -> int:
         return product_id
     except sqlite3.IntegrityError:
         # Ya existe, devolver el ID existente
+        conn.rollback()
         cursor.execute("SELECT id FROM products WHERE url = ?", (url,))
         row = cursor.fetchone()
         print(f"⚠️  Producto ya existe con ID: {row['id']}")
         return row["id"]
-    finally:
-        conn.close()
 
 
 def get_active_products() -> list:
@@ -82,7 +104,6 @@ def get_active_products() -> list:
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM products WHERE active = 1")
     products = [dict(row) for row in cursor.fetchall()]
-    conn.close()
     return products
 
 
@@ -95,13 +116,29 @@ def save_price(product_id: int, price: float, currency: str = "ARS", in_stock: b
         (product_id, price, currency, 1 if in_stock else 0)
     )
     conn.commit()
-    conn.close()
+
+
+def save_prices_bulk(rows: list):
+    """
+    Guarda varios registros de precio en una sola transacción.
+    Cada fila es (product_id, price, currency, in_stock).
+    """
+    if not rows:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO price_history (product_id, price, currency, in_stock) VALUES (?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
 
 
 def get_price_history(product_id: int, limit: int = 168) -> list:
     """
     Retorna el historial de precios de un producto.
     Por defecto las últimas 168 horas (7 días).
+    Las filas son sqlite3.Row (acceso por nombre, sin copiar a dict).
     """
     conn = get_connection()
     cursor = conn.cursor()
@@ -112,12 +149,38 @@ def get_price_history(product_id: int, limit: int = 168) -> list:
         ORDER BY checked_at ASC
         LIMIT ?
     """, (product_id, limit))
-    history = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return history
+    return cursor.fetchall()
 
 
-def get_last_price(product_id: int) -> dict | None:
+def get_price_histories_bulk(product_ids: list, limit: int = 168) -> dict:
+    """
+    Historial de varios productos en una sola consulta, con el mismo
+    criterio que get_price_history. Retorna {product_id: [filas]}.
+    """
+    if not product_ids:
+        return {}
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(product_ids))
+    cursor.execute(f"""
+        SELECT product_id, price, currency, in_stock, checked_at
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY product_id ORDER BY checked_at ASC, id ASC
+            ) AS rn
+            FROM price_history
+            WHERE product_id IN ({placeholders})
+        )
+        WHERE rn <= ?
+        ORDER BY product_id, rn
+    """, [*product_ids, limit])
+    histories = {pid: [] for pid in product_ids}
+    for row in cursor.fetchall():
+        histories[row["product_id"]].append(row)
+    return histories
+
+
+def get_last_price(product_id: int) -> sqlite3.Row | None:
     """Retorna el último precio registrado para un producto."""
     conn = get_connection()
     cursor = conn.cursor()
@@ -128,9 +191,33 @@ def get_last_price(product_id: int) -> dict | None:
         ORDER BY checked_at DESC
         LIMIT 1
     """, (product_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    return cursor.fetchone()
+
+
+def get_last_prices_bulk(product_ids: list) -> dict:
+    """
+    Último precio registrado de varios productos en una sola consulta.
+    Retorna {product_id: fila}; los productos sin historial no aparecen.
+    `checked_at_display` trae la fecha lista para mostrar (YYYY-MM-DD HH:MM).
+    """
+    if not product_ids:
+        return {}
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(product_ids))
+    cursor.execute(f"""
+        SELECT product_id, price, currency, in_stock, checked_at,
+               substr(replace(checked_at, 'T', ' '), 1, 16) AS checked_at_display
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY product_id ORDER BY checked_at DESC
+            ) AS rn
+            FROM price_history
+            WHERE product_id IN ({placeholders})
+        )
+        WHERE rn = 1
+    """, list(product_ids))
+    return {row["product_id"]: row for row in cursor.fetchall()}
 
 
 def remove_product(product_id: int):
@@ -139,5 +226,4 @@ def remove_product(product_id: int):
     cursor = conn.cursor()
     cursor.execute("UPDATE products SET active = 0 WHERE id = ?", (product_id,))
     conn.commit()
-    conn.close()
     print(f"🗑️  Producto {product_id} desactivado.")
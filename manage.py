@@ -3,9 +3,10 @@ manage.py - Herramienta CLI para gestionar productos sin usar el bot
 """
 
 import sys
+import asyncio
 import argparse
 import database as db
-from scraper import scrape_product, detect_store
+from scraper import scrape_product, scrape_products_async, detect_store, PlaywrightPool
 
 
 def cmd_add(args):
@@ -37,8 +38,9 @@ def cmd_list(args):
 
     print(f"\n{'ID':<5} {'Tienda':<15} {'Nombre':<40} {'Último precio':<15}")
     print("-" * 80)
+    lasts = db.get_last_prices_bulk([p["id"] for p in products])
     for p in products:
-        last = db.get_last_price(p["id"])
+        last = lasts.get(p["id"])
         price_str = f"{last['currency']} {last['price']:,.0f}" if last and last["price"] else "Sin datos"
         print(f"{p['id']:<5} {p['store']:<15} {p['name'][:39]:<40} {price_str:<15}")
 
@@ -54,11 +56,21 @@ def cmd_check(args):
         print("📋 No hay productos.")
         return
 
-    for p in products:
-        result = scrape_product(p)
+    asyncio.run(_check_all(products))
+
+
+async def _check_all(products: list):
+    # Scrapes en paralelo (limitados por tienda) con un solo browser
+    # para todos los fallbacks a Playwright de esta corrida
+    async with PlaywrightPool() as pool:
+        results = await scrape_products_async(products, pool)
+
+    lasts = db.get_last_prices_bulk([p["id"] for p in products])
+    rows = []
+    for p, result in zip(products, results):
         if result.price:
-            last = db.get_last_price(p["id"])
-            db.save_price(p["id"], result.price, result.currency, result.in_stock)
+            last = lasts.get(p["id"])
+            rows.append((p["id"], result.price, result.currency, 1 if result.in_stock else 0))
             change = ""
             if last and last["price"]:
                 pct = ((result.price - last["price"]) / last["price"]) * 100
@@ -68,6 +80,8 @@ def cmd_check(args):
         else:
             print(f"⚠️  {p['name'][:40]} — No se pudo obtener precio")
 
+    await asyncio.to_thread(db.save_prices_bulk, rows)
+
 
 def main():
     db.init_db()
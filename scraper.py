@@ -5,14 +5,18 @@ Soporta: MercadoLibre, Amazon, HardGamers y sitios genéricos
 
 import re
 import os
+import random
 import asyncio
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
+from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
+from selectolax.lexbor import LexborHTMLParser
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,7 +24,31 @@ load_dotenv()
 SCRAPE_DELAY = float(os.getenv("SCRAPE_DELAY_SECONDS", 3))
 TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 15))
 
-ua = UserAgent()
+# Máximo de scrapes simultáneos contra una misma tienda
+STORE_CONCURRENCY = 2
+# Topes globales (el bot corre en 512 MB): scrapes en curso en total y
+# páginas de Playwright abiertas a la vez en el Chromium compartido
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", 4))
+PLAYWRIGHT_MAX_PAGES = int(os.getenv("PLAYWRIGHT_MAX_PAGES", 2))
+
+# User-Agents de browsers reales; se elige uno al azar por request
+_USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.3; rv:123.0) Gecko/20100101 Firefox/123.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:123.0) Gecko/20100101 Firefox/123.0",
+)
+
+# Sesión compartida: reutiliza conexiones TCP/TLS (keep-alive) entre
+# productos de la misma tienda
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
 
 
 @dataclass
@@ -39,81 +67,114 @@ class ScrapeResult:
 #  DETECTAR TIENDA DESDE LA URL
 # ─────────────────────────────────────────────
 
+_STORE_RE = re.compile(r"mercadolibre|meli|amazon|hardgamers|garbarino|fravega|musimundo|fullh4rd")
+_STORE_MAP = {"meli": "mercadolibre"}
+
+
 def detect_store(url: str) -> str:
-    url_lower = url.lower()
-    if "mercadolibre" in url_lower or "meli" in url_lower:
-        return "mercadolibre"
-    elif "amazon" in url_lower:
-        return "amazon"
-    elif "hardgamers" in url_lower:
-        return "hardgamers"
-    elif "garbarino" in url_lower:
-        return "garbarino"
-    elif "fravega" in url_lower:
-        return "fravega"
-    elif "musimundo" in url_lower:
-        return "musimundo"
-    elif "fullh4rd" in url_lower:
-        return "fullh4rd"
-    else:
+    # Una sola pasada sobre la URL: gana la primera tienda que aparece
+    m = _STORE_RE.search(url.lower())
+    if not m:
         return "generic"
+    store = m.group(0)
+    return _STORE_MAP.get(store, store)
 
 
 # ─────────────────────────────────────────────
 #  PARSERS POR TIENDA
 # ─────────────────────────────────────────────
 
+class _PriceChars(dict):
+    """Tabla para str.translate: conserva dígitos, '.' y ',' y borra el resto."""
+
+    def __missing__(self, code: int):
+        keep = code if chr(code) in "0123456789.," else None
+        self[code] = keep
+        return keep
+
+
+_PRICE_KEEP = _PriceChars()
+
+# Patrones compilados una sola vez al importar el módulo
+_RE_ML_TITLE = re.compile(r"ui-pdp-title")
+_RE_ML_ITEM_TITLE = re.compile(r"item-title")
+_RE_ML_FRAC = re.compile(r"andes-money-amount__fraction")
+_RE_ML_CENTS = re.compile(r"andes-money-amount__cents")
+_RE_NO_STOCK = re.compile(r"sin stock|agotado|no disponible", re.I)
+_RE_AMZ_WHOLE = re.compile(r"a-price-whole")
+_RE_UNAVAILABLE = re.compile(r"unavailable|out of stock", re.I)
+_RE_HG_TITLE = re.compile(r"product.*title|title.*product", re.I)
+_RE_HG_NO_STOCK = re.compile(r"sin stock|agotado", re.I)
+_RE_PRICE_CLASS = re.compile(r"price|precio", re.I)
+_RE_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.I)
+
+@lru_cache(maxsize=1024)
 def parse_price_text(text: str) -> Optional[float]:
-    """Limpia y convierte texto de precio a float."""
+    """
+    Limpia y convierte texto de precio a float.
+    Memoizada: los mismos textos de precio se repiten entre chequeos y
+    el parser genérico la llama sobre muchos nodos de la misma página.
+    """
     if not text:
         return None
     # Eliminar símbolos de moneda y espacios
-    cleaned = re.sub(r'[^\d.,]', '', text.strip())
-    # Manejar formato argentino: 1.234.567,89
-    if ',' in cleaned and '.' in cleaned:
-        if cleaned.rfind(',') > cleaned.rfind('.'):
-            cleaned = cleaned.replace('.', '').replace(',', '.')
-        else:
-            cleaned = cleaned.replace(',', '')
-    elif ',' in cleaned:
-        cleaned = cleaned.replace(',', '.')
-    elif cleaned.count('.') > 1:
-        cleaned = cleaned.replace('.', '', cleaned.count('.') - 1)
+    cleaned = text.translate(_PRICE_KEEP)
+    # El último separador es el decimal: 1.234.567,89 (argentino) ó 1,234.56;
+    # el resto son separadores de miles. Si ese separador se repite
+    # (1.234.567 ó 1,234,567) son todos de miles y no hay decimales.
+    sep = ',' if cleaned.rfind(',') > cleaned.rfind('.') else '.'
+    if cleaned.count(sep) > 1:
+        cleaned = cleaned.replace('.', '').replace(',', '')
+    else:
+        head, found, tail = cleaned.rpartition(sep)
+        if found:
+            cleaned = f"{head.replace('.', '').replace(',', '')}.{tail}"
     try:
         return float(cleaned)
     except ValueError:
         return None
 
 
+def _join_ml_price(fraction: str, cents: str = "") -> Optional[float]:
+    """
+    MercadoLibre muestra el entero (sin decimales, con separador de
+    miles) y los centavos en spans separados: se parsean por separado.
+    """
+    whole = parse_price_text(fraction.replace(".", "").replace(",", ""))
+    if whole is not None and cents.isdigit():
+        whole += int(cents) / 10 ** len(cents)
+    return whole
+
+
 def parse_mercadolibre(soup: BeautifulSoup, url: str) -> dict:
     result = {"price": None, "currency": "ARS", "in_stock": True, "name": ""}
 
     # Nombre del producto
     name_tag = (
-        soup.find("h1", class_=re.compile(r"ui-pdp-title")) or
-        soup.find("h1", class_=re.compile(r"item-title"))
+        soup.find("h1", class_=_RE_ML_TITLE) or
+        soup.find("h1", class_=_RE_ML_ITEM_TITLE)
     )
     if name_tag:
         result["name"] = name_tag.get_text(strip=True)
 
     # Precio principal
     price_tag = (
-        soup.find("span", class_=re.compile(r"andes-money-amount__fraction")) or
+        soup.find("span", class_=_RE_ML_FRAC) or
         soup.find("meta", itemprop="price")
     )
     if price_tag:
         if price_tag.name == "meta":
             result["price"] = parse_price_text(price_tag.get("content", ""))
         else:
-            price_text = price_tag.get_text(strip=True)
             # Buscar centavos
-            cents_tag = soup.find("span", class_=re.compile(r"andes-money-amount__cents"))
-            if cents_tag:
-                price_text += "." + cents_tag.get_text(strip=True)
-            result["price"] = parse_price_text(price_text)
+            cents_tag = soup.find("span", class_=_RE_ML_CENTS)
+            result["price"] = _join_ml_price(
+                price_tag.get_text(strip=True),
+                cents_tag.get_text(strip=True) if cents_tag else ""
+            )
 
     # Stock
-    no_stock = soup.find(string=re.compile(r"sin stock|agotado|no disponible", re.I))
+    no_stock = soup.find(string=_RE_NO_STOCK)
     if no_stock:
         result["in_stock"] = False
 
@@ -132,7 +193,7 @@ def parse_amazon(soup: BeautifulSoup, url: str) -> dict:
     price_selectors = [
         ("span", {"id": "priceblock_ourprice"}),
         ("span", {"id": "priceblock_dealprice"}),
-        ("span", {"class": re.compile(r"a-price-whole")}),
+        ("span", {"class": _RE_AMZ_WHOLE}),
         ("span", {"id": "price_inside_buybox"}),
     ]
     for tag, attrs in price_selectors:
@@ -148,7 +209,7 @@ def parse_amazon(soup: BeautifulSoup, url: str) -> dict:
                 break
 
     # Stock
-    unavailable = soup.find(id="outOfStock") or soup.find(string=re.compile(r"unavailable|out of stock", re.I))
+    unavailable = soup.find(id="outOfStock") or soup.find(string=_RE_UNAVAILABLE)
     if unavailable:
         result["in_stock"] = False
 
@@ -167,18 +228,18 @@ def parse_amazon(soup: BeautifulSoup, url: str) -> dict:
 def parse_hardgamers(soup: BeautifulSoup, url: str) -> dict:
     result = {"price": None, "currency": "ARS", "in_stock": True, "name": ""}
 
-    name_tag = soup.find("h1", class_=re.compile(r"product.*title|title.*product", re.I)) or soup.find("h1")
+    name_tag = soup.find("h1", class_=_RE_HG_TITLE) or soup.find("h1")
     if name_tag:
         result["name"] = name_tag.get_text(strip=True)
 
     price_tag = (
-        soup.find("span", class_=re.compile(r"price|precio", re.I)) or
-        soup.find("p", class_=re.compile(r"price|precio", re.I))
+        soup.find("span", class_=_RE_PRICE_CLASS) or
+        soup.find("p", class_=_RE_PRICE_CLASS)
     )
     if price_tag:
         result["price"] = parse_price_text(price_tag.get_text(strip=True))
 
-    no_stock = soup.find(string=re.compile(r"sin stock|agotado", re.I))
+    no_stock = soup.find(string=_RE_HG_NO_STOCK)
     if no_stock:
         result["in_stock"] = False
 
@@ -204,7 +265,7 @@ def parse_generic(soup: BeautifulSoup, url: str) -> dict:
         result["price"] = parse_price_text(og_price.get("content", ""))
     else:
         # Buscar elementos con clases que contengan "price" o "precio"
-        for tag in soup.find_all(class_=re.compile(r'price|precio', re.I)):
+        for tag in soup.find_all(class_=_RE_PRICE_CLASS):
             text = tag.get_text(strip=True)
             price = parse_price_text(text)
             if price and price > 0:
@@ -226,22 +287,159 @@ PARSERS = {
 }
 
 
+# ─────────────────────────────────────────────
+#  PARSERS RÁPIDOS CON SELECTOLAX
+#  Mismas reglas que los parsers BS4 pero sobre el árbol en C de lexbor.
+#  Se prueban primero; si no encuentran precio se usa el parser BS4.
+# ─────────────────────────────────────────────
+
+def _page_text(tree: LexborHTMLParser) -> str:
+    return tree.root.text(separator="\n") if tree.root else ""
+
+
+def fast_parse_mercadolibre(tree: LexborHTMLParser, url: str) -> dict:
+    result = {"price": None, "currency": "ARS", "in_stock": True, "name": ""}
+
+    name_tag = (
+        tree.css_first('h1[class*="ui-pdp-title"]') or
+        tree.css_first('h1[class*="item-title"]')
+    )
+    if name_tag:
+        result["name"] = name_tag.text(strip=True)
+
+    price_tag = tree.css_first('span[class*="andes-money-amount__fraction"]')
+    if price_tag:
+        cents_tag = tree.css_first('span[class*="andes-money-amount__cents"]')
+        result["price"] = _join_ml_price(
+            price_tag.text(strip=True),
+            cents_tag.text(strip=True) if cents_tag else ""
+        )
+    else:
+        meta = tree.css_first('meta[itemprop="price"]')
+        if meta:
+            result["price"] = parse_price_text(meta.attributes.get("content") or "")
+
+    if _RE_NO_STOCK.search(_page_text(tree)):
+        result["in_stock"] = False
+
+    return result
+
+
+def fast_parse_amazon(tree: LexborHTMLParser, url: str) -> dict:
+    result = {"price": None, "currency": "USD", "in_stock": True, "name": ""}
+
+    name_tag = tree.css_first("span#productTitle")
+    if name_tag:
+        result["name"] = name_tag.text(strip=True)
+
+    price_selectors = [
+        "span#priceblock_ourprice",
+        "span#priceblock_dealprice",
+        'span[class*="a-price-whole"]',
+        "span#price_inside_buybox",
+    ]
+    for selector in price_selectors:
+        price_tag = tree.css_first(selector)
+        if price_tag:
+            price_text = price_tag.text(strip=True)
+            frac_tag = tree.css_first("span.a-price-fraction")
+            if frac_tag and "." not in price_text:
+                price_text += "." + frac_tag.text(strip=True)
+            result["price"] = parse_price_text(price_text)
+            if result["price"]:
+                break
+
+    if tree.css_first("#outOfStock") or _RE_UNAVAILABLE.search(_page_text(tree)):
+        result["in_stock"] = False
+
+    currency_tag = tree.css_first("span.a-price-symbol")
+    if currency_tag:
+        symbol = currency_tag.text(strip=True)
+        if "$" in symbol:
+            result["currency"] = "USD"
+        elif "€" in symbol:
+            result["currency"] = "EUR"
+
+    return result
+
+
+def fast_parse_generic(tree: LexborHTMLParser, url: str) -> dict:
+    result = {"price": None, "currency": "ARS", "in_stock": True, "name": ""}
+
+    og_title = tree.css_first('meta[property="og:title"]')
+    if og_title:
+        result["name"] = og_title.attributes.get("content") or ""
+    else:
+        h1 = tree.css_first("h1")
+        if h1:
+            result["name"] = h1.text(strip=True)
+
+    og_price = tree.css_first('meta[property="product:price:amount"]')
+    if og_price:
+        result["price"] = parse_price_text(og_price.attributes.get("content") or "")
+    else:
+        for node in tree.css("[class]"):
+            if not _RE_PRICE_CLASS.search(node.attributes.get("class") or ""):
+                continue
+            price = parse_price_text(node.text(strip=True))
+            if price and price > 0:
+                result["price"] = price
+                break
+
+    return result
+
+
+FAST_PARSERS = {
+    "mercadolibre": fast_parse_mercadolibre,
+    "amazon": fast_parse_amazon,
+    "garbarino": fast_parse_generic,
+    "fravega": fast_parse_generic,
+    "musimundo": fast_parse_generic,
+    "fullh4rd": fast_parse_generic,
+    "generic": fast_parse_generic,
+}
+
+
 # ─────────────────────────────────────────────
 #  SCRAPING CON BS4 (rápido, sin JS)
 # ─────────────────────────────────────────────
 
+def _decode_html(response: requests.Response) -> str:
+    """
+    Decodifica el HTML con el charset del header HTTP o, si no viene,
+    con el del <meta charset> de la página (UTF-8 si no hay ninguno).
+    """
+    if "charset" in response.headers.get("content-type", "").lower():
+        encoding = response.encoding
+    else:
+        match = _RE_META_CHARSET.search(response.content[:4096])
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return response.content.decode(encoding, errors="replace")
+    except LookupError:
+        return response.content.decode("utf-8", errors="replace")
+
+
 def scrape_with_bs4(url: str, store: str) -> Optional[dict]:
     """Intenta scraping con requests + BeautifulSoup."""
     headers = {
-        "User-Agent": ua.random,
+        "User-Agent": random.choice(_USER_AGENTS),
         "Accept-Language": "es-AR,es;q=0.9,en;q=0.8",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Referer": "https://www.google.com/",
     }
     try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT)
+        response = SESSION.get(url, headers=headers, timeout=TIMEOUT)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "lxml")
+
+        fast_parser = FAST_PARSERS.get(store)
+        if fast_parser:
+            # lexbor con bytes asume UTF-8: se le pasa el texto ya decodificado
+            data = fast_parser(LexborHTMLParser(_decode_html(response)), url)
+            if data["price"]:
+                return data
+
+        soup = BeautifulSoup(response.content, "lxml")
         parser = PARSERS.get(store, parse_generic)
         data = parser(soup, url)
         if data["price"]:
@@ -257,27 +455,131 @@ def scrape_with_bs4(url: str, store: str) -> Optional[dict]:
 #  SCRAPING CON PLAYWRIGHT (con JS, más robusto)
 # ─────────────────────────────────────────────
 
-async def scrape_with_playwright_async(url: str, store: str) -> Optional[dict]:
-    """Scraping con Playwright para páginas que requieren JavaScript."""
-    try:
+# Playwright solo deja pasar lo necesario para que el JS arme la página:
+# el documento y scripts/XHR de la propia tienda (y de sus CDNs). Imágenes,
+# CSS, fuentes, analytics y widgets de terceros se abortan.
+_ALLOWED_RESOURCES = frozenset({"document", "xhr", "fetch", "script"})
+_STORE_ASSET_HOSTS = {
+    "mercadolibre": ("mlstatic.com",),
+    "amazon": ("media-amazon.com", "ssl-images-amazon.com"),
+}
+_SECOND_LEVEL_LABELS = frozenset({"com", "net", "org", "gob", "gov", "co"})
+
+
+def _base_domain(host: str) -> str:
+    """tienda.fravega.com.ar → fravega.com.ar, cdn.example.com → example.com"""
+    labels = host.split(".")
+    keep = 3 if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_LABELS else 2
+    return ".".join(labels[-keep:])
+
+
+def _allowed_hosts(url: str, store: str) -> tuple:
+    hosts = [_base_domain(urlparse(url).hostname or "")]
+    if store != "generic":
+        hosts.append(store)
+    hosts.extend(_STORE_ASSET_HOSTS.get(store, ()))
+    return tuple(hosts)
+
+
+class PlaywrightPool:
+    """
+    Un único Chromium compartido entre varios scrapes: el browser se
+    levanta una sola vez (en el primer uso) y cada URL abre solo una
+    página nueva (como mucho `max_pages` abiertas a la vez). Usar como
+    `async with PlaywrightPool() as pool:`.
+    """
+
+    def __init__(self, max_pages: int = PLAYWRIGHT_MAX_PAGES):
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self._start_lock = asyncio.Lock()
+        self._page_slots = asyncio.Semaphore(max_pages)
+        # Si el browser no arranca, no se reintenta en cada fetch del pool
+        self._start_error = None
+
+    async def start(self):
         from playwright.async_api import async_playwright
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent=ua.random,
+        try:
+            self._playwright = await async_playwright().start()
+            self.browser = await self._playwright.chromium.launch(headless=True)
+            self.context = await self.browser.new_context(
+                user_agent=random.choice(_USER_AGENTS),
                 locale="es-AR",
                 extra_http_headers={"Accept-Language": "es-AR,es;q=0.9"}
             )
-            page = await context.new_page()
-
-            # Bloquear recursos innecesarios para ser más rápido
-            await page.route("**/*.{png,jpg,jpeg,gif,svg,woff,woff2}", lambda route: route.abort())
+        except Exception as e:
+            # No dejar vivo el driver (ni el browser) de un arranque a medias
+            self._start_error = e
+            await self.stop()
+            raise
+
+    async def stop(self):
+        if self.browser:
+            await self.browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._playwright = self.browser = self.context = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def fetch(self, url: str, store: str = "generic") -> str:
+        """Carga la URL en una página nueva y retorna el HTML renderizado."""
+        async with self._page_slots:
+            return await self._fetch_page(url, store)
+
+    async def _fetch_page(self, url: str, store: str) -> str:
+        async with self._start_lock:
+            if self._start_error is not None:
+                raise RuntimeError(f"Playwright no pudo arrancar: {self._start_error}")
+            if self.context is None:
+                await self.start()
+        page = await self.context.new_page()
+        try:
+            # Bloquear todo lo que no sea de la tienda o no haga falta
+            allowed_hosts = _allowed_hosts(url, store)
+
+            async def filter_request(route):
+                request = route.request
+                if request.resource_type == "document" and request.frame == page.main_frame:
+                    await route.continue_()
+                elif (
+                    request.resource_type in _ALLOWED_RESOURCES
+                    and any(h in (urlparse(request.url).hostname or "") for h in allowed_hosts)
+                ):
+                    await route.continue_()
+                else:
+                    await route.abort()
+
+            await page.route("**/*", filter_request)
 
             await page.goto(url, wait_until="domcontentloaded", timeout=TIMEOUT * 1000)
             await page.wait_for_timeout(2000)  # Esperar JS dinámico
 
-            content = await page.content()
-            await browser.close()
+            return await page.content()
+        finally:
+            await page.close()
+
+
+async def scrape_with_playwright_async(
+    url: str,
+    store: str,
+    pool: Optional[PlaywrightPool] = None
+) -> Optional[dict]:
+    """
+    Scraping con Playwright para páginas que requieren JavaScript.
+    Si no se pasa un pool, levanta un browser solo para esta URL.
+    """
+    try:
+        if pool is not None:
+            content = await pool.fetch(url, store)
+        else:
+            async with PlaywrightPool() as own_pool:
+                content = await own_pool.fetch(url, store)
 
         soup = BeautifulSoup(content, "lxml")
         parser = PARSERS.get(store, parse_generic)
@@ -303,13 +605,7 @@ def scrape_product(product: dict) -> ScrapeResult:
     Intenta scraping con BS4 primero.
     Si falla o no encuentra precio, cae a Playwright.
     """
-    url = product["url"]
-    store = product.get("store") or detect_store(url)
-    product_id = product["id"]
-    original_name = product["name"]
-
-    print(f"\n🔍 Scraping: {original_name[:50]}")
-    print(f"   Tienda: {store} | URL: {url[:60]}...")
+    url, store = _start_scrape(product)
 
     time.sleep(SCRAPE_DELAY)
 
@@ -322,6 +618,66 @@ def scrape_product(product: dict) -> ScrapeResult:
         print("   → Fallback a Playwright...")
         data = scrape_with_playwright(url, store)
 
+    return _build_result(product, url, store, data)
+
+
+async def scrape_product_async(product: dict, pool: Optional[PlaywrightPool] = None) -> ScrapeResult:
+    """
+    Igual que scrape_product, pero para usar dentro de un event loop:
+    el fallback a Playwright reutiliza el browser de `pool`.
+    """
+    url, store = _start_scrape(product)
+
+    await asyncio.sleep(SCRAPE_DELAY)
+
+    print("   → Intentando con BeautifulSoup...")
+    data = await asyncio.to_thread(scrape_with_bs4, url, store)
+
+    if not data or not data.get("price"):
+        print("   → Fallback a Playwright...")
+        data = await scrape_with_playwright_async(url, store, pool)
+
+    return _build_result(product, url, store, data)
+
+
+async def scrape_products_async(
+    products: list,
+    pool: Optional[PlaywrightPool] = None,
+    per_store: int = STORE_CONCURRENCY,
+    max_total: int = SCRAPE_CONCURRENCY
+) -> list:
+    """
+    Scrapea varios productos en paralelo y retorna los ScrapeResult en el
+    mismo orden. Como mucho `per_store` scrapes simultáneos por tienda,
+    así SCRAPE_DELAY espacia los requests a cada sitio y no a todos juntos,
+    y `max_total` en total.
+    """
+    semaphores = {}
+    total = asyncio.Semaphore(max_total)
+
+    async def scrape_one(product: dict) -> ScrapeResult:
+        store = product.get("store") or detect_store(product["url"])
+        semaphore = semaphores.setdefault(store, asyncio.Semaphore(per_store))
+        async with semaphore, total:
+            return await scrape_product_async(product, pool)
+
+    return await asyncio.gather(*(scrape_one(p) for p in products))
+
+
+def _start_scrape(product: dict) -> tuple:
+    """Resuelve URL y tienda del producto y loggea el inicio del scrape."""
+    url = product["url"]
+    store = product.get("store") or detect_store(url)
+
+    print(f"\n🔍 Scraping: {product['name'][:50]}")
+    print(f"   Tienda: {store} | URL: {url[:60]}...")
+    return url, store
+
+
+def _build_result(product: dict, url: str, store: str, data: Optional[dict]) -> ScrapeResult:
+    product_id = product["id"]
+    original_name = product["name"]
+
     if data and data.get("price"):
         name = data.get("name") or original_name
         print(f"   ✅ Precio: {data['currency']} {data['price']:,.2f} | Stock: {data['in_stock']}")
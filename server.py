@@ -1,73 +1,86 @@
 """
 server.py - Servidor HTTP mínimo para mantener el servicio vivo en Render free tier.
-Corre en un thread separado junto al bot de Telegram.
+Corre con aiohttp dentro del mismo event loop que el bot de Telegram.
 UptimeRobot lo pingea cada 14 minutos → Render nunca duerme el proceso.
 """
 
 import os
-import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import time
+import asyncio
 from datetime import datetime
 
+from aiohttp import web
+
 import database as db
 
 PORT = int(os.getenv("PORT", 8080))
 
+# /status no necesita estar al segundo: se cachea el texto unos segundos
+# para no golpear SQLite en cada request
+STATUS_TTL_SECONDS = 30
+_STATUS_CACHE = {"ts": float("-inf"), "body": ""}
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    """Endpoint raíz — lo usa UptimeRobot para el ping."""
+    return web.Response(text="OK")
+
+
+async def handle_status(request: web.Request) -> web.Response:
+    """Endpoint de estado — muestra productos y último chequeo."""
+    if time.monotonic() - _STATUS_CACHE["ts"] < STATUS_TTL_SECONDS:
+        return web.Response(text=_STATUS_CACHE["body"], charset="utf-8")
+
+    try:
+        # SQLite es bloqueante: se consulta fuera del event loop
+        body = await asyncio.to_thread(_render_status)
+        _STATUS_CACHE["body"] = body
+        _STATUS_CACHE["ts"] = time.monotonic()
+    except Exception as e:
+        body = f"Error: {e}"
+    return web.Response(text=body, charset="utf-8")
 
-class HealthHandler(BaseHTTPRequestHandler):
 
-    def do_GET(self):
-        if self.path == "/":
-            self._respond_health()
-        elif self.path == "/status":
-            self._respond_status()
+def _render_status() -> str:
+    products = db.get_active_products()
+    lines = [f"🤖 Monitor de Precios — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"]
+    lines.append(f"Productos monitoreados: {len(products)}\n\n")
+    lasts = db.get_last_prices_bulk([p["id"] for p in products])
+    for p in products:
+        last = lasts.get(p["id"])
+        if last and last["price"]:
+            price_str = f"{last['currency']} {last['price']:,.0f}"
+            stock = "✅" if last["in_stock"] else "❌"
+            lines.append(f"{stock} [{p['store']}] {p['name'][:40]} — {price_str}\n")
         else:
-            self.send_response(404)
-            self.end_headers()
-
-    def _respond_health(self):
-        """Endpoint raíz — lo usa UptimeRobot para el ping."""
-        self.send_response(200)
-        self.send_header("Content-Type", "text/plain")
-        self.end_headers()
-        self.wfile.write(b"OK")
-
-    def _respond_status(self):
-        """Endpoint de estado — muestra productos y último chequeo."""
-        try:
-            products = db.get_active_products()
-            lines = [f"🤖 Monitor de Precios — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"]
-            lines.append(f"Productos monitoreados: {len(products)}\n\n")
-            for p in products:
-                last = db.get_last_price(p["id"])
-                if last and last["price"]:
-                    price_str = f"{last['currency']} {last['price']:,.0f}"
-                    stock = "✅" if last["in_stock"] else "❌"
-                    lines.append(f"{stock} [{p['store']}] {p['name'][:40]} — {price_str}\n")
-                else:
-                    lines.append(f"⏳ [{p['store']}] {p['name'][:40]} — sin datos\n")
-
-            body = "".join(lines).encode()
-        except Exception as e:
-            body = f"Error: {e}".encode()
-
-        self.send_response(200)
-        self.send_header("Content-Type", "text/plain; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(body)
-
-    def log_message(self, format, *args):
-        # Silenciar logs de cada ping para no ensuciar la consola
-        if self.path != "/":
-            print(f"[HTTP] {self.address_string()} {format % args}")
-
-
-def start_server():
-    """Arranca el servidor HTTP en un thread daemon."""
-    httpd = HTTPServer(("0.0.0.0", PORT), HealthHandler)
+            lines.append(f"⏳ [{p['store']}] {p['name'][:40]} — sin datos\n")
+    return "".join(lines)
+
+
+@web.middleware
+async def _log_requests(request: web.Request, handler):
+    response = await handler(request)
+    # Silenciar logs de cada ping para no ensuciar la consola
+    if request.path != "/":
+        print(f"[HTTP] {request.remote} {request.method} {request.path} {response.status}")
+    return response
+
+
+async def start_server() -> web.AppRunner:
+    """
+    Arranca el servidor HTTP en el event loop actual.
+    Retorna el runner; llamar a `runner.cleanup()` para detenerlo.
+    """
+    app = web.Application(middlewares=[_log_requests])
+    app.router.add_get("/", handle_health)
+    app.router.add_get("/status", handle_status)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "0.0.0.0", PORT)
+    await site.start()
+
     print(f"🌐 Servidor keep-alive escuchando en puerto {PORT}")
     print(f"   → GET /        (ping de UptimeRobot)")
     print(f"   → GET /status  (estado de productos)")
-    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
-    thread.start()
-    return httpd
+    return runner
@@ -3,11 +3,16 @@ telegram_bot.py - Bot de Telegram con comandos y notificaciones automáticas
 """
 
 import os
-import io
+import time
+import asyncio
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from typing import Optional
 
+import numpy as np
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
@@ -15,12 +20,14 @@ from telegram.ext import (
     CommandHandler,
     ContextTypes,
     CallbackQueryHandler,
+    AIORateLimiter,
 )
 from telegram.constants import ParseMode
 
 import database as db
 import charts
-from scraper import scrape_product, detect_store
+import server
+from scraper import scrape_product_async, scrape_products_async, detect_store, PlaywrightPool
 
 load_dotenv()
 
@@ -28,6 +35,29 @@ TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 DROP_THRESHOLD = float(os.getenv("PRICE_DROP_THRESHOLD_PERCENT", 5))
 CHECK_INTERVAL_HOURS = int(os.getenv("CHECK_INTERVAL_HOURS", 1))
+# Cada worker re-importa el bot (~140 MB): en el free tier de Render
+# (512 MB) conviene dejar 1
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", 1))
+
+# Procesos para renderizar gráficos: matplotlib retiene el GIL casi todo
+# el render, así que con threads los gráficos no corren en paralelo.
+# Se crea al arrancar el bot (_post_init), no al importar: los workers
+# "spawn" importan este módulo y no deben crear su propio pool
+_CHART_POOL: Optional[ProcessPoolExecutor] = None
+
+# Un solo thread escritor para SQLite: las escrituras no bloquean el
+# event loop y nunca compiten entre sí por el lock de escritura
+_DB_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+# Telegram admite ~1 msg/s por chat. AIORateLimiter solo limita por chat
+# a los grupos, así que las notificaciones a CHAT_ID se espacian acá
+CHAT_SEND_INTERVAL = 1.0
+_CHAT_SEND_LOCK = asyncio.Lock()
+_CHAT_LAST_SEND = float("-inf")
+
+# Lista de productos activos cacheada entre handlers (cambia poco)
+PRODUCTS_CACHE_TTL = 30
+_PRODUCTS_CACHE = {"ts": float("-inf"), "data": None, "by_id": {}}
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -40,70 +70,241 @@ logger = logging.getLogger(__name__)
 #  UTILIDADES
 # ─────────────────────────────────────────────
 
+# Separador de miles argentino: 1,234,567 → 1.234.567
+_ARS_THOUSANDS = str.maketrans(",", ".")
+
+
 def format_price(price: float, currency: str = "ARS") -> str:
     if currency == "ARS":
-        return f"${price:,.0f}".replace(",", ".")
+        return f"${price:,.0f}".translate(_ARS_THOUSANDS)
     return f"${price:,.2f} {currency}"
 
 
+STORE_EMOJIS = {
+    "mercadolibre": "🛒",
+    "amazon": "📦",
+    "hardgamers": "🎮",
+    "garbarino": "🏠",
+    "fravega": "🛍️",
+    "musimundo": "🎵",
+    "fullh4rd": "💻",
+    "generic": "🌐",
+}
+
+
+def price_changes_pct(new_prices: np.ndarray, old_prices: np.ndarray) -> np.ndarray:
+    """Variación % de cada precio; NaN donde no hay precio anterior válido."""
+    pct = np.full(new_prices.shape, np.nan)
+    np.divide(new_prices - old_prices, old_prices, out=pct, where=old_prices > 0)
+    return pct * 100
+
+
 def store_emoji(store: str) -> str:
-    emojis = {
-        "mercadolibre": "🛒",
-        "amazon": "📦",
-        "hardgamers": "🎮",
-        "garbarino": "🏠",
-        "fravega": "🛍️",
-        "musimundo": "🎵",
-        "fullh4rd": "💻",
-        "generic": "🌐",
-    }
-    return emojis.get(store.lower(), "🏪")
+    # `store` viene de detect_store(), que ya lo devuelve en minúsculas
+    return STORE_EMOJIS.get(store, "🏪")
+
+
+def _refresh_products_cache(ttl: float = PRODUCTS_CACHE_TTL):
+    """Relee los productos activos de la DB si el cache tiene más de `ttl` segundos."""
+    if time.monotonic() - _PRODUCTS_CACHE["ts"] >= ttl:
+        products = db.get_active_products()
+        _PRODUCTS_CACHE["data"] = products
+        _PRODUCTS_CACHE["by_id"] = {p["id"]: p for p in products}
+        _PRODUCTS_CACHE["ts"] = time.monotonic()
+
+
+def _get_products_cached() -> list:
+    """Productos activos, releídos de la DB como mucho cada PRODUCTS_CACHE_TTL segundos."""
+    _refresh_products_cache()
+    return _PRODUCTS_CACHE["data"]
+
+
+def _active_index() -> dict:
+    """Índice {id: producto} de los productos activos, con el mismo TTL que la lista."""
+    _refresh_products_cache()
+    return _PRODUCTS_CACHE["by_id"]
+
+
+def _invalidate_products_cache():
+    _PRODUCTS_CACHE["ts"] = float("-inf")
+
+
+def _find_active_product(product_id: int) -> Optional[dict]:
+    """
+    Producto activo por ID desde _active_index(). Si no está, se relee la
+    DB una vez: pudo agregarse por fuera del bot (p.ej. manage.py agregar).
+    """
+    product = _active_index().get(product_id)
+    if product is None:
+        _invalidate_products_cache()
+        product = _active_index().get(product_id)
+    return product
+
+
+async def _send_to_chat(send, **kwargs):
+    """
+    Llama a `send` (p.ej. context.bot.send_photo) hacia CHAT_ID dejando
+    al menos CHAT_SEND_INTERVAL segundos entre un envío y el siguiente.
+    """
+    global _CHAT_LAST_SEND
+    async with _CHAT_SEND_LOCK:
+        wait = _CHAT_LAST_SEND + CHAT_SEND_INTERVAL - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            return await send(chat_id=CHAT_ID, **kwargs)
+        finally:
+            _CHAT_LAST_SEND = time.monotonic()
+
+
+async def _db_write(func, *args):
+    """Corre una escritura de `db` en _DB_POOL y espera el resultado."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_DB_POOL, func, *args)
+
+
+def _render(
+    product_name: str,
+    store: str,
+    history: list,
+    current_price: Optional[float],
+    currency: str
+) -> bytes:
+    """Render en un proceso de _CHART_POOL (tiene que ser top-level para poder picklearse)."""
+    return charts.generate_price_chart(product_name, store, history, current_price, currency)
+
+
+def _get_chart_pool() -> ProcessPoolExecutor:
+    global _CHART_POOL
+    if _CHART_POOL is None:
+        # "spawn" porque el proceso del bot ya tiene threads (no es seguro forkear)
+        _CHART_POOL = ProcessPoolExecutor(
+            max_workers=CHART_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _CHART_POOL
+
+
+def _discard_chart_pool(pool: ProcessPoolExecutor):
+    global _CHART_POOL
+    # Varios renders pueden fallar a la vez con el mismo pool roto
+    if _CHART_POOL is pool:
+        _CHART_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _render_chart(
+    product_name: str,
+    store: str,
+    history: list,
+    current_price: Optional[float],
+    currency: str,
+    product_id: Optional[int] = None
+) -> bytes:
+    """
+    Renderiza el gráfico en _CHART_POOL. El cache de charts se consulta
+    acá, en el proceso del bot, así un gráfico repetido ni se picklea.
+    """
+    key = charts.chart_cache_key(product_id, history, current_price, currency)
+    if key is not None:
+        cached = charts.get_cached_chart(key)
+        if cached is not None:
+            return cached
+
+    # sqlite3.Row no se puede picklear: se mandan dicts al proceso
+    rows = [dict(entry) for entry in history]
+    loop = asyncio.get_running_loop()
+    pool = _get_chart_pool()
+    try:
+        image_bytes = await loop.run_in_executor(
+            pool, _render, product_name, store, rows, current_price, currency
+        )
+    except BrokenProcessPool:
+        # Murió un worker (p.ej. OOM): se descarta el pool para que el
+        # próximo gráfico levante uno nuevo, y este se renderiza en un thread
+        logger.warning("Pool de gráficos roto; se recrea y este render va en un thread")
+        _discard_chart_pool(pool)
+        image_bytes = await loop.run_in_executor(
+            None, _render, product_name, store, rows, current_price, currency
+        )
+    if key is not None:
+        charts.cache_chart(key, image_bytes)
+    return image_bytes
 
 
 async def send_price_chart(
     context: ContextTypes.DEFAULT_TYPE,
     chat_id: str,
     product: dict,
-    caption: str = ""
+    caption: str = "",
+    history: Optional[list] = None,
+    last=None
 ):
-    """Envía el gráfico de precios como imagen al chat."""
-    history = db.get_price_history(product["id"])
-    last = db.get_last_price(product["id"])
-    currency = last.get("currency", "ARS") if last else "ARS"
+    """
+    Envía el gráfico de precios como imagen al chat.
+    `history` y `last` se pueden pasar si el caller ya los leyó de la DB.
+    El render se memoiza en charts por producto y último registro, así
+    que re-enviar un gráfico sin datos nuevos no vuelve a dibujarlo.
+    """
+    if history is None:
+        history = db.get_price_history(product["id"])
+    if last is None:
+        last = db.get_last_price(product["id"])
+    currency = last["currency"] if last else "ARS"
     current_price = last["price"] if last else None
 
-    image_bytes = charts.generate_price_chart(
+    image_bytes = await _render_chart(
         product_name=product["name"],
         store=product["store"],
         history=history,
         current_price=current_price,
-        currency=currency
+        currency=currency,
+        product_id=product["id"]
     )
     await context.bot.send_photo(
         chat_id=chat_id,
-        photo=io.BytesIO(image_bytes),
+        photo=image_bytes,
         caption=caption,
         parse_mode=ParseMode.HTML
     )
 
 
+# ─────────────────────────────────────────────
+#  TEXTOS FIJOS
+# ─────────────────────────────────────────────
+
+_START_TEXT = (
+    "👋 <b>Bienvenido al Monitor de Precios</b>\n\n"
+    "Comandos disponibles:\n"
+    "➕ /agregar <code>URL</code> — Agregar producto a monitorear\n"
+    "📋 /lista — Ver todos los productos\n"
+    "📊 /precio <code>ID</code> — Ver gráfico de evolución\n"
+    "🔍 /chequear — Chequear precios ahora\n"
+    "🗑️ /eliminar <code>ID</code> — Dejar de monitorear\n"
+    "ℹ️ /ayuda — Ver esta ayuda\n\n"
+    "Enviame un link de producto para agregarlo directamente!"
+)
+_USAGE_AGREGAR = (
+    "❌ Uso: <code>/agregar https://url-del-producto.com</code>\n"
+    "Opcionalmente: <code>/agregar URL Nombre del producto</code>"
+)
+_USAGE_PRECIO = (
+    "❌ Uso: <code>/precio ID</code>\n"
+    "Podés ver los IDs con /lista"
+)
+_USAGE_ELIMINAR = "❌ Uso: <code>/eliminar ID</code>"
+_EMPTY_LIST_TEXT = (
+    "📋 No tenés productos monitoreados.\n"
+    "Usá /agregar para empezar!"
+)
+
+
 # ─────────────────────────────────────────────
 #  COMANDOS
 # ─────────────────────────────────────────────
 
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    text = (
-        "👋 <b>Bienvenido al Monitor de Precios</b>\n\n"
-        "Comandos disponibles:\n"
-        "➕ /agregar <code>URL</code> — Agregar producto a monitorear\n"
-        "📋 /lista — Ver todos los productos\n"
-        "📊 /precio <code>ID</code> — Ver gráfico de evolución\n"
-        "🔍 /chequear — Chequear precios ahora\n"
-        "🗑️ /eliminar <code>ID</code> — Dejar de monitorear\n"
-        "ℹ️ /ayuda — Ver esta ayuda\n\n"
-        "Enviame un link de producto para agregarlo directamente!"
-    )
-    await update.message.reply_text(text, parse_mode=ParseMode.HTML)
+    await update.message.reply_text(_START_TEXT, parse_mode=ParseMode.HTML)
 
 
 async def cmd_ayuda(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -114,11 +315,7 @@ async def cmd_agregar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Agrega un nuevo producto. Uso: /agregar URL [nombre opcional]"""
     args = context.args
     if not args:
-        await update.message.reply_text(
-            "❌ Uso: <code>/agregar https://url-del-producto.com</code>\n"
-            "Opcionalmente: <code>/agregar URL Nombre del producto</code>",
-            parse_mode=ParseMode.HTML
-        )
+        await update.message.reply_text(_USAGE_AGREGAR, parse_mode=ParseMode.HTML)
         return
 
     url = args[0]
@@ -134,7 +331,7 @@ async def cmd_agregar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     store = detect_store(url)
     temp_product = {"id": 0, "name": custom_name or "Nuevo producto", "url": url, "store": store}
 
-    result = scrape_product(temp_product)
+    result = await scrape_product_async(temp_product)
 
     if result.error and not result.price:
         await msg.edit_text(
@@ -146,10 +343,11 @@ async def cmd_agregar(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     name = custom_name or result.name or f"Producto de {store}"
-    product_id = db.add_product(name, url, store)
+    product_id = await _db_write(db.add_product, name, url, store)
+    _invalidate_products_cache()
 
     if result.price:
-        db.save_price(product_id, result.price, result.currency, result.in_stock)
+        await _db_write(db.save_price, product_id, result.price, result.currency, result.in_stock)
 
     stock_text = "✅ En stock" if result.in_stock else "❌ Sin stock"
     price_text = format_price(result.price, result.currency) if result.price else "No disponible"
@@ -169,33 +367,31 @@ async def cmd_agregar(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_lista(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lista todos los productos monitoreados."""
-    products = db.get_active_products()
+    products = _get_products_cached()
 
     if not products:
-        await update.message.reply_text(
-            "📋 No tenés productos monitoreados.\n"
-            "Usá /agregar para empezar!"
-        )
+        await update.message.reply_text(_EMPTY_LIST_TEXT)
         return
 
-    text = "📋 <b>Productos monitoreados:</b>\n\n"
+    lasts = db.get_last_prices_bulk([p["id"] for p in products])
+    parts = ["📋 <b>Productos monitoreados:</b>\n\n"]
     for p in products:
-        last = db.get_last_price(p["id"])
+        last = lasts.get(p["id"])
         emoji = store_emoji(p["store"])
 
         if last:
             price_text = format_price(last["price"], last["currency"])
             stock_icon = "✅" if last["in_stock"] else "❌"
-            time_ago = last["checked_at"][:16].replace("T", " ")
-            price_line = f"{stock_icon} {price_text} <i>(actualizado: {time_ago})</i>"
+            price_line = f"{stock_icon} {price_text} <i>(actualizado: {last['checked_at_display']})</i>"
         else:
             price_line = "⏳ Sin datos aún"
 
-        text += (
+        parts.append(
             f"{emoji} <b>{p['name'][:40]}</b>\n"
             f"   {price_line}\n"
             f"   🆔 ID: <code>{p['id']}</code> | /precio_{p['id']}\n\n"
         )
+    text = "".join(parts)
 
     # Botones inline para ver cada gráfico
     keyboard = [
@@ -214,16 +410,11 @@ async def cmd_precio(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Ver el gráfico de evolución de un producto. Uso: /precio ID"""
     args = context.args
     if not args or not args[0].isdigit():
-        await update.message.reply_text(
-            "❌ Uso: <code>/precio ID</code>\n"
-            "Podés ver los IDs con /lista",
-            parse_mode=ParseMode.HTML
-        )
+        await update.message.reply_text(_USAGE_PRECIO, parse_mode=ParseMode.HTML)
         return
 
     product_id = int(args[0])
-    products = db.get_active_products()
-    product = next((p for p in products if p["id"] == product_id), None)
+    product = _find_active_product(product_id)
 
     if not product:
         await update.message.reply_text(f"❌ No encontré el producto con ID {product_id}")
@@ -246,7 +437,7 @@ async def cmd_precio(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
     await msg.delete()
-    await send_price_chart(context, update.effective_chat.id, product, caption)
+    await send_price_chart(context, update.effective_chat.id, product, caption, history=history, last=last)
 
 
 async def cmd_chequear(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -260,12 +451,22 @@ async def cmd_chequear(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"🔍 Chequeando {len(products)} producto(s)... Aguardá un momento."
     )
 
+    # Scrapes en paralelo (limitados por tienda), un solo browser para los fallbacks
+    async with PlaywrightPool() as pool:
+        scraped = await scrape_products_async(products, pool)
+
+    lasts = db.get_last_prices_bulk([p["id"] for p in products])
+    rows = [
+        (product["id"], result.price, result.currency, 1 if result.in_stock else 0)
+        for product, result in zip(products, scraped)
+        if result.price
+    ]
+    await _db_write(db.save_prices_bulk, rows)
+
     results = []
-    for product in products:
-        result = scrape_product(product)
+    for product, result in zip(products, scraped):
         if result.price:
-            last = db.get_last_price(product["id"])
-            db.save_price(product["id"], result.price, result.currency, result.in_stock)
+            last = lasts.get(product["id"])
 
             change = ""
             if last and last["price"]:
@@ -292,21 +493,18 @@ async def cmd_eliminar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Elimina un producto del monitoreo. Uso: /eliminar ID"""
     args = context.args
     if not args or not args[0].isdigit():
-        await update.message.reply_text(
-            "❌ Uso: <code>/eliminar ID</code>",
-            parse_mode=ParseMode.HTML
-        )
+        await update.message.reply_text(_USAGE_ELIMINAR, parse_mode=ParseMode.HTML)
         return
 
     product_id = int(args[0])
-    products = db.get_active_products()
-    product = next((p for p in products if p["id"] == product_id), None)
+    product = _find_active_product(product_id)
 
     if not product:
         await update.message.reply_text(f"❌ No encontré el producto con ID {product_id}")
         return
 
-    db.remove_product(product_id)
+    await _db_write(db.remove_product, product_id)
+    _invalidate_products_cache()
     await update.message.reply_text(
         f"🗑️ <b>{product['name']}</b> eliminado del monitoreo.",
         parse_mode=ParseMode.HTML
@@ -317,33 +515,84 @@ async def cmd_eliminar(update: Update, context: ContextTypes.DEFAULT_TYPE):
 #  CALLBACK BOTONES INLINE
 # ─────────────────────────────────────────────
 
+async def _handle_chart_button(context: ContextTypes.DEFAULT_TYPE, query, arg: str):
+    """Botón "chart_<ID>": envía el gráfico del producto."""
+    product_id = int(arg)
+    product = _find_active_product(product_id)
+
+    if not product:
+        await query.edit_message_text("❌ Producto no encontrado.")
+        return
+
+    last = db.get_last_price(product_id)
+    price_text = format_price(last["price"], last["currency"]) if last else "N/A"
+    caption = (
+        f"📊 <b>{product['name'][:50]}</b>\n"
+        f"💰 Precio actual: <b>{price_text}</b>\n"
+        f"🔗 <a href='{product['url']}'>Ver en tienda</a>"
+    )
+    await send_price_chart(context, query.message.chat_id, product, caption, last=last)
+
+
+# callback_data es "<prefijo>_<argumento>"; el prefijo elige el handler
+_CALLBACK_DISPATCH = {
+    "chart_": _handle_chart_button,
+}
+
+
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    if query.data.startswith("chart_"):
-        product_id = int(query.data.replace("chart_", ""))
-        products = db.get_active_products()
-        product = next((p for p in products if p["id"] == product_id), None)
-
-        if not product:
-            await query.edit_message_text("❌ Producto no encontrado.")
-            return
-
-        last = db.get_last_price(product_id)
-        price_text = format_price(last["price"], last["currency"]) if last else "N/A"
-        caption = (
-            f"📊 <b>{product['name'][:50]}</b>\n"
-            f"💰 Precio actual: <b>{price_text}</b>\n"
-            f"🔗 <a href='{product['url']}'>Ver en tienda</a>"
-        )
-        await send_price_chart(context, query.message.chat_id, product, caption)
+    prefix, _, arg = query.data.partition("_")
+    handler = _CALLBACK_DISPATCH.get(prefix + "_")
+    if handler:
+        await handler(context, query, arg)
 
 
 # ─────────────────────────────────────────────
 #  JOB: CHEQUEO AUTOMÁTICO PROGRAMADO
 # ─────────────────────────────────────────────
 
+async def _send_drop_alert(context: ContextTypes.DEFAULT_TYPE, alert: dict, history: list):
+    emoji = store_emoji(alert["product"]["store"])
+    old = format_price(alert["old_price"], alert["currency"])
+    new = format_price(alert["new_price"], alert["currency"])
+    savings = format_price(alert["old_price"] - alert["new_price"], alert["currency"])
+    restock_line = "🟢 <b>¡Y volvió al stock!</b>\n" if alert["back_in_stock"] else ""
+
+    caption = (
+        f"🔥 <b>¡DROP DE PRECIO!</b>\n\n"
+        f"{emoji} <b>{alert['product']['name'][:50]}</b>\n\n"
+        f"{restock_line}"
+        f"❌ Antes: <s>{old}</s>\n"
+        f"✅ Ahora: <b>{new}</b>\n"
+        f"💸 Ahorrás: <b>{savings}</b> ({alert['pct_change']:.1f}%)\n\n"
+        f"🔗 <a href='{alert['product']['url']}'>¡Comprar ahora!</a>"
+    )
+
+    try:
+        image_bytes = await _render_chart(
+            product_name=alert["product"]["name"],
+            store=alert["product"]["store"],
+            history=history,
+            current_price=alert["new_price"],
+            currency=alert["currency"],
+            product_id=alert["product"]["id"]
+        )
+    except Exception as e:
+        # Sin gráfico la alerta sale igual, como texto
+        logger.error(f"[CRON] Falló el gráfico de '{alert['product']['name'][:40]}': {e}")
+        await _send_to_chat(context.bot.send_message, text=caption, parse_mode=ParseMode.HTML)
+        return
+    await _send_to_chat(
+        context.bot.send_photo,
+        photo=image_bytes,
+        caption=caption,
+        parse_mode=ParseMode.HTML
+    )
+
+
 async def scheduled_check(context: ContextTypes.DEFAULT_TYPE):
     """Job que se ejecuta cada N horas para chequear precios."""
     products = db.get_active_products()
@@ -352,34 +601,52 @@ async def scheduled_check(context: ContextTypes.DEFAULT_TYPE):
 
     logger.info(f"[CRON] Chequeando {len(products)} productos...")
     alerts = []
+    sends = []  # (nombre del producto, corutina de envío)
 
-    for product in products:
-        result = scrape_product(product)
-        if not result.price:
-            continue
+    async with PlaywrightPool() as pool:
+        scraped = await scrape_products_async(products, pool)
 
-        last = db.get_last_price(product["id"])
-        db.save_price(product["id"], result.price, result.currency, result.in_stock)
+    lasts = db.get_last_prices_bulk([p["id"] for p in products])
+    checked = [
+        (product, result, lasts.get(product["id"]))
+        for product, result in zip(products, scraped)
+        if result.price
+    ]
+    rows = [
+        (product["id"], result.price, result.currency, 1 if result.in_stock else 0)
+        for product, result, _ in checked
+    ]
+    await _db_write(db.save_prices_bulk, rows)
 
-        # Detectar drop de precio
-        if last and last["price"] and last["price"] > 0:
-            pct_change = ((result.price - last["price"]) / last["price"]) * 100
+    # Variaciones de todos los productos en una sola pasada vectorizada
+    new_prices = np.array([result.price for _, result, _ in checked], dtype=np.float64)
+    old_prices = np.array(
+        [(last["price"] or 0.0) if last else 0.0 for _, _, last in checked],
+        dtype=np.float64
+    )
+    pct_changes = price_changes_pct(new_prices, old_prices)
+    drops = pct_changes <= -DROP_THRESHOLD
 
-            if pct_change <= -DROP_THRESHOLD:
-                # ¡Drop de precio!
+    for i, (product, result, last) in enumerate(checked):
+        # Detectar drop de precio
+        if old_prices[i] > 0:
+            back_in_stock = not last["in_stock"] and result.in_stock
+            if drops[i]:
+                # ¡Drop de precio! Si además volvió al stock va en el mismo mensaje
                 alerts.append({
                     "product": product,
                     "old_price": last["price"],
                     "new_price": result.price,
                     "currency": result.currency,
-                    "pct_change": pct_change,
+                    "pct_change": float(pct_changes[i]),
                     "in_stock": result.in_stock,
+                    "back_in_stock": back_in_stock,
                 })
 
             # Notificar si vuelve a tener stock
-            elif not last["in_stock"] and result.in_stock:
-                await context.bot.send_message(
-                    chat_id=CHAT_ID,
+            elif back_in_stock:
+                sends.append((product["name"], _send_to_chat(
+                    context.bot.send_message,
                     text=(
                         f"🟢 <b>¡Volvió al stock!</b>\n"
                         f"📦 <b>{product['name'][:50]}</b>\n"
@@ -387,54 +654,64 @@ async def scheduled_check(context: ContextTypes.DEFAULT_TYPE):
                         f"🔗 <a href='{product['url']}'>Ver en tienda</a>"
                     ),
                     parse_mode=ParseMode.HTML
-                )
-
-    # Enviar alertas de drops
-    for alert in alerts:
-        emoji = store_emoji(alert["product"]["store"])
-        old = format_price(alert["old_price"], alert["currency"])
-        new = format_price(alert["new_price"], alert["currency"])
-        savings = format_price(alert["old_price"] - alert["new_price"], alert["currency"])
-
-        caption = (
-            f"🔥 <b>¡DROP DE PRECIO!</b>\n\n"
-            f"{emoji} <b>{alert['product']['name'][:50]}</b>\n\n"
-            f"❌ Antes: <s>{old}</s>\n"
-            f"✅ Ahora: <b>{new}</b>\n"
-            f"💸 Ahorrás: <b>{savings}</b> ({alert['pct_change']:.1f}%)\n\n"
-            f"🔗 <a href='{alert['product']['url']}'>¡Comprar ahora!</a>"
-        )
-
-        history = db.get_price_history(alert["product"]["id"])
-        image_bytes = charts.generate_price_chart(
-            product_name=alert["product"]["name"],
-            store=alert["product"]["store"],
-            history=history,
-            current_price=alert["new_price"],
-            currency=alert["currency"]
-        )
-        await context.bot.send_photo(
-            chat_id=CHAT_ID,
-            photo=io.BytesIO(image_bytes),
-            caption=caption,
-            parse_mode=ParseMode.HTML
-        )
+                )))
+
+    # Enviar todo junto: los gráficos se renderizan en paralelo en
+    # _CHART_POOL y _send_to_chat espacia los envíos a CHAT_ID.
+    # Un envío que falla no corta los demás: se loguea y se sigue
+    histories = db.get_price_histories_bulk([alert["product"]["id"] for alert in alerts])
+    sends.extend(
+        (alert["product"]["name"], _send_drop_alert(context, alert, histories[alert["product"]["id"]]))
+        for alert in alerts
+    )
+    results = await asyncio.gather(*(coro for _, coro in sends), return_exceptions=True)
+    failed = 0
+    for (name, _), result in zip(sends, results):
+        if isinstance(result, Exception):
+            failed += 1
+            logger.error(f"[CRON] No se pudo notificar '{name[:40]}': {result}")
 
     # Resumen cada 24hs (cada 24 chequeos si es 1h)
     # (podés descomentar esto si querés resumen diario)
     # await send_daily_summary(context)
 
-    logger.info(f"[CRON] Listo. {len(alerts)} alertas enviadas.")
+    logger.info(f"[CRON] Listo. {len(alerts)} alertas, {len(sends) - failed}/{len(sends)} mensajes enviados.")
 
 
 # ─────────────────────────────────────────────
 #  ARRANCAR EL BOT
 # ─────────────────────────────────────────────
 
+async def _post_init(app: Application):
+    # Servidor keep-alive en el mismo event loop que el bot
+    app.bot_data["http_runner"] = await server.start_server()
+    _get_chart_pool()
+
+
+async def _post_shutdown(app: Application):
+    runner = app.bot_data.get("http_runner")
+    if runner:
+        await runner.cleanup()
+    if _CHART_POOL is not None:
+        _CHART_POOL.shutdown(cancel_futures=True)
+
+
 def run_bot():
     db.init_db()
-
-    app = Application.builder().token(TOKEN).build()
+    # Abrir de entrada la conexión del thread escritor
+    _DB_POOL.submit(db.get_connection).result()
+
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        # Límite global de Telegram (30 msg/s) y de grupos (20 msg/min por
+        # chat); reintenta ante RetryAfter. Los privados no tienen límite
+        # por chat acá: ver _send_to_chat
+        .rate_limiter(AIORateLimiter(max_retries=3))
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+        .build()
+    )
 
     # Comandos
     app.add_handler(CommandHandler("start", cmd_start))